@@ -5,6 +5,13 @@ personen_label_gruppenfoto.py
 
 In: github.com/DiAbrell/py-pers-label-gruppenfoto
 
+Neu in v3e:
+- Erkennung läuft im Hintergrund-Thread, der Box-Editor öffnet sofort
+- Boxen erscheinen schrittweise (grob -> fein, --detect-stages); manuelle Änderungen bleiben erhalten
+- --export-crops   -> Porträt je Person (<image>_portraets/<id>_<name>.jpg), parallel im Thread-Pool
+- --contact-sheet  -> zusätzlich Kontaktbogen aller Porträts mit Beschriftung
+- --threads N / PLG_THREADS / --pin-cpus -> Thread-Budget für OpenCV und Worker-Pools (sonst automatisch)
+
 Neu in v3d:
 - --skip-detection  -> überspringt Erkennung & GUI; lädt Boxen aus CSV und rendert sofort neu
 - --boxes-csv PATH  -> CSV mit Spalten id,name,x,y,w,h (wenn nicht angegeben, wird <image>_legende.csv versucht)
@@ -23,7 +30,9 @@ from __future__ import annotations
 import argparse
 import csv
 import os
+import queue
 import sys
+import threading
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, Optional
 
@@ -45,6 +54,167 @@ class Face:
         return (self.x + self.w / 2.0, self.y + self.h / 2.0)
 
 
+THREADS_ENV = "PLG_THREADS"
+
+
+@dataclass
+class ThreadBudget:
+    threads: int
+    source: str
+    cpus: List[int]
+    cgroup_limit: Optional[float] = None
+    opencv_threads: int = 0
+    pinned: bool = False
+    pool_workers: int = 0  # > 0, wenn ein Worker-Pool lief (OpenCV dort mit 1 Thread je Worker)
+
+    def describe(self) -> str:
+        parts = [f"{self.threads} (Quelle: {self.source})", f"OpenCV: {self.opencv_threads}",
+                 f"CPUs verfügbar: {len(self.cpus)}"]
+        if self.pool_workers:
+            parts.append(f"Porträt-Pool: {self.pool_workers} Worker x OpenCV 1")
+        if self.cgroup_limit is not None:
+            parts.append(f"cgroup-Quota: {self.cgroup_limit:g}")
+        if self.pinned:
+            parts.append(f"gepinnt auf: {_format_cpu_list(self.cpus)}")
+        return ", ".join(parts)
+
+
+def _parse_cpu_list(text: str) -> List[int]:
+    """'0-3,6' -> [0, 1, 2, 3, 6]"""
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-", 1)
+            cpus.update(range(int(a), int(b) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def _format_cpu_list(cpus: List[int]) -> str:
+    out = []
+    for c in sorted(cpus):
+        if out and out[-1][1] == c - 1:
+            out[-1][1] = c
+        else:
+            out.append([c, c])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in out)
+
+
+def available_cpus() -> List[int]:
+    """CPUs, auf denen der Prozess laufen darf (Affinität); ohne sched_getaffinity alle laut os.cpu_count()."""
+    if hasattr(os, "sched_getaffinity"):
+        try:
+            return sorted(os.sched_getaffinity(0))
+        except OSError:
+            pass
+    return list(range(os.cpu_count() or 1))
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_V1_CPU_MOUNTS = ("cpu", "cpu,cpuacct", "cpuacct,cpu")
+
+
+def _own_cgroup_paths() -> Tuple[str, str]:
+    """Eigene cgroup-Pfade aus /proc/self/cgroup: (v2-Pfad, v1-Pfad des cpu-Controllers); '/' wenn unbekannt."""
+    v2, v1 = "/", "/"
+    try:
+        with open("/proc/self/cgroup", "r") as fh:
+            for line in fh:
+                parts = line.strip().split(":", 2)
+                if len(parts) != 3:
+                    continue
+                hid, controllers, path = parts
+                if hid == "0" and controllers == "":
+                    v2 = path or "/"
+                elif "cpu" in controllers.split(","):
+                    v1 = path or "/"
+    except OSError:
+        pass
+    return v2, v1
+
+
+def _cgroup_dirs(mount: str, path: str) -> List[str]:
+    """Verzeichnis der eigenen cgroup und aller Eltern bis zur Wurzel des Mounts."""
+    parts = [p for p in path.split("/") if p]
+    return [os.path.join(mount, *parts[:i]) for i in range(len(parts), -1, -1)]
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    CPU-Quota der eigenen cgroup (v2 cpu.max bzw. v1 cfs_quota/period) in Kernen, None = unbegrenzt.
+    Berücksichtigt auch Eltern-cgroups (z. B. systemd-Slices mit CPUQuota=); es gilt die kleinste Quota.
+    """
+    v2_path, v1_path = _own_cgroup_paths()
+    limits: List[float] = []
+    for d in _cgroup_dirs(CGROUP_ROOT, v2_path):
+        try:
+            with open(os.path.join(d, "cpu.max"), "r") as fh:
+                quota, period = fh.read().split()[:2]
+            if quota != "max":
+                limits.append(int(quota) / float(period))
+        except (OSError, ValueError):
+            pass
+    for mount in CGROUP_V1_CPU_MOUNTS:
+        for d in _cgroup_dirs(os.path.join(CGROUP_ROOT, mount), v1_path):
+            try:
+                with open(os.path.join(d, "cpu.cfs_quota_us"), "r") as fh:
+                    quota = int(fh.read().strip())
+                with open(os.path.join(d, "cpu.cfs_period_us"), "r") as fh:
+                    period = int(fh.read().strip())
+                if quota > 0 and period > 0:
+                    limits.append(quota / float(period))
+            except (OSError, ValueError):
+                pass
+    return min(limits) if limits else None
+
+
+def configure_threads(requested: int = 0, pin_cpus: str = "") -> ThreadBudget:
+    """
+    Legt das Thread-Budget fest und setzt cv2.setNumThreads entsprechend.
+    Reihenfolge: requested (--threads) > Umgebungsvariable PLG_THREADS > automatisch aus
+    CPU-Affinität und cgroup-Quota. Mit pin_cpus (z. B. '0-3') wird der Prozess vorher auf diese
+    CPUs beschränkt, damit parallel laufende Kopien sich nicht dieselben Kerne teilen.
+    """
+    pinned = False
+    if pin_cpus:
+        if not hasattr(os, "sched_setaffinity"):
+            print("Warnung: --pin-cpus wird auf diesem System nicht unterstützt.", file=sys.stderr)
+        else:
+            try:
+                os.sched_setaffinity(0, _parse_cpu_list(pin_cpus))
+                pinned = True
+            except (OSError, ValueError) as ex:
+                print(f"Warnung: Konnte CPUs nicht pinnen ({pin_cpus}): {ex}", file=sys.stderr)
+
+    cpus = available_cpus()
+    limit = cgroup_cpu_limit()
+
+    threads, source = 0, ""
+    if requested > 0:
+        threads, source = requested, "--threads"
+    else:
+        env = os.environ.get(THREADS_ENV, "").strip()
+        if env:
+            try:
+                threads, source = int(env), THREADS_ENV
+            except ValueError:
+                print(f"Warnung: {THREADS_ENV}={env!r} ist keine Zahl – ignoriert.", file=sys.stderr)
+    if threads <= 0:
+        threads = len(cpus)
+        source = "Affinität"
+        if limit is not None and limit < threads:
+            threads, source = max(1, int(limit)), "cgroup-Quota"
+    threads = max(1, threads)
+
+    cv2.setNumThreads(threads)
+    return ThreadBudget(threads=threads, source=source, cpus=cpus, cgroup_limit=limit,
+                        opencv_threads=cv2.getNumThreads(), pinned=pinned)
+
+
 def detect_faces(
     image_bgr,
     cascade_path: str,
@@ -53,33 +223,176 @@ def detect_faces(
     min_size: int = 40,
     padding: int = 6,
 ) -> List[Face]:
-    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
-    gray = cv2.equalizeHist(gray)
+    return detect_faces_progressive(image_bgr, cascade_path, scale_factor=scale_factor, min_neighbors=min_neighbors,
+                                    min_size=min_size, padding=padding, stages=1)
+
 
+def _pad_rects_to_faces(rects, W: int, H: int, padding: int) -> List[Face]:
+    faces: List[Face] = []
+    for (x, y, w, h) in rects:
+        x2 = max(0, int(x) - padding)
+        y2 = max(0, int(y) - padding)
+        w2 = min(W - x2, int(w) + 2 * padding)
+        h2 = min(H - y2, int(h) + 2 * padding)
+        faces.append(Face(x2, y2, w2, h2))
+    return faces
+
+
+def detection_scales(n_stages: int, width: int, height: int) -> List[float]:
+    """
+    Skalen grob -> fein, z. B. 3 Stufen -> [0.25, 0.5, 1.0]. Die letzte Stufe ist immer volle Auflösung.
+    Grobe Stufen, deren Bild kaum größer als das Cascade-Fenster (24 px) wäre, entfallen.
+    """
+    n = max(1, int(n_stages))
+    scales = [1.0 / (2 ** k) for k in reversed(range(n))]
+    return [s for s in scales if s >= 1.0 or min(width, height) * s >= 4 * 24]
+
+
+def detect_faces_progressive(
+    image_bgr,
+    cascade_path: str,
+    scale_factor: float = 1.2,
+    min_neighbors: int = 5,
+    min_size: int = 40,
+    padding: int = 6,
+    stages: int = 3,
+    on_stage=None,
+    stop_event: Optional[threading.Event] = None,
+) -> List[Face]:
+    """
+    Gesichtserkennung (Haarcascade) grob -> fein auf verkleinerten Kopien des Bildes.
+    Nach jeder Stufe wird on_stage(stufe, anzahl_stufen, faces) aufgerufen (Boxen in Originalkoordinaten).
+    Die letzte Stufe läuft auf voller Auflösung; detect_faces ist dieser Aufruf mit stages=1.
+    """
     if not os.path.exists(cascade_path):
         raise FileNotFoundError(f"Cascade nicht gefunden: {cascade_path}")
 
+    gray_full = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
+    H, W = gray_full.shape[:2]
     cascade = cv2.CascadeClassifier(cascade_path)
-    rects = cascade.detectMultiScale(
-        gray,
-        scaleFactor=scale_factor,
-        minNeighbors=min_neighbors,
-        minSize=(min_size, min_size),
-        flags=cv2.CASCADE_SCALE_IMAGE,
-    )
 
+    # Grobe Stufen finden nur große Gesichter (minSize mind. Fenstergröße der Cascade, 24 px)
+    scales = detection_scales(stages, W, H)
     faces: List[Face] = []
-    H, W = gray.shape[:2]
-    for (x, y, w, h) in rects:
-        x2 = max(0, x - padding)
-        y2 = max(0, y - padding)
-        w2 = min(W - x2, w + 2 * padding)
-        h2 = min(H - y2, h + 2 * padding)
-        faces.append(Face(x2, y2, w2, h2))
-
+    for n, s in enumerate(scales, 1):
+        if stop_event is not None and stop_event.is_set():
+            break
+        if s < 1.0:
+            gray = cv2.resize(gray_full, (max(1, int(W * s)), max(1, int(H * s))), interpolation=cv2.INTER_AREA)
+        else:
+            gray = gray_full
+        gray = cv2.equalizeHist(gray)
+        ms = max(1, int(round(min_size * s))) if s >= 1.0 else max(24, int(round(min_size * s)))
+        # detectMultiScale gibt den GIL frei -> Editor-Thread bleibt bedienbar
+        rects = cascade.detectMultiScale(
+            gray,
+            scaleFactor=scale_factor,
+            minNeighbors=min_neighbors,
+            minSize=(ms, ms),
+            flags=cv2.CASCADE_SCALE_IMAGE,
+        )
+        rects = [(x / s, y / s, w / s, h / s) for (x, y, w, h) in rects]
+        faces = _pad_rects_to_faces(rects, W, H, padding)
+        if on_stage is not None:
+            on_stage(n, len(scales), faces)
     return faces
 
 
+class DetectionWorker:
+    """
+    Führt detect_faces_progressive in einem Hintergrund-Thread aus.
+    Zwischenergebnisse landen in einer Queue, die der Box-Editor per poll() abholt.
+    """
+
+    def __init__(self, image_bgr, cascade_path: str, scale_factor: float = 1.2, min_neighbors: int = 5,
+                 min_size: int = 40, padding: int = 6, stages: int = 3):
+        self.results: "queue.Queue[Tuple[int, int, List[Face]]]" = queue.Queue()
+        self.stop_event = threading.Event()
+        self.error: Optional[Exception] = None
+        self.stage = 0
+        self.n_stages = len(detection_scales(stages, image_bgr.shape[1], image_bgr.shape[0]))
+        self.faces: List[Face] = []
+        self._kwargs = dict(cascade_path=cascade_path, scale_factor=scale_factor, min_neighbors=min_neighbors,
+                            min_size=min_size, padding=padding, stages=stages)
+        self._image = image_bgr
+        self._thread = threading.Thread(target=self._run, name="face-detection", daemon=True)
+
+    def start(self) -> "DetectionWorker":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            detect_faces_progressive(self._image, on_stage=self._on_stage, stop_event=self.stop_event, **self._kwargs)
+        except Exception as ex:
+            self.error = ex
+
+    def _on_stage(self, n: int, total: int, faces: List[Face]):
+        self.results.put((n, total, faces))
+
+    def poll(self) -> Optional[List[Face]]:
+        """Neuestes noch nicht abgeholtes Zwischenergebnis (oder None)."""
+        latest = None
+        while True:
+            try:
+                n, total, faces = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.stage, self.n_stages, self.faces = n, total, faces
+            latest = faces
+        return latest
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() or not self.results.empty()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wartet bis timeout auf das Ende des Threads; True, wenn er beendet ist."""
+        self._thread.join(timeout)
+        self.poll()
+        return not self._thread.is_alive()
+
+
+def _rects_overlap(a, b, iou_thresh: float = 0.3) -> bool:
+    ax, ay, aw, ah = a; bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    if inter <= 0:
+        return False
+    union = aw * ah + bw * bh - inter
+    if union > 0 and inter / union >= iou_thresh:
+        return True
+    # Mittelpunkt der einen Box in der anderen -> gleiche Person
+    acx, acy = ax + aw / 2.0, ay + ah / 2.0
+    bcx, bcy = bx + bw / 2.0, by + bh / 2.0
+    return (bx <= acx <= bx + bw and by <= acy <= by + bh) or (ax <= bcx <= ax + aw and ay <= bcy <= ay + ah)
+
+
+def merge_detections(rects, auto_rects, rejected, detected):
+    """
+    Führt neue Automatik-Boxen mit dem Editorstand zusammen.
+    - rects: aktuelle Boxen im Editor
+    - auto_rects: Boxen, die aus der Automatik stammen und unverändert sind (werden ersetzt)
+    - rejected: vom Benutzer gelöschte Boxen (dort wird nichts wieder eingefügt)
+    - detected: neue Automatik-Boxen
+    Gibt (neue rects, neue auto_rects) zurück. Manuell angelegte/verschobene Boxen bleiben immer erhalten.
+    """
+    auto_set = set(auto_rects)
+    kept = [r for r in rects if r not in auto_set]
+    added = []
+    for r in detected:
+        if any(_rects_overlap(r, k) for k in kept):
+            continue
+        if any(_rects_overlap(r, d) for d in rejected):
+            continue
+        added.append(r)
+    return kept + added, added
+
+
 def _group_faces_into_rows_from_rects(rects: List[Tuple[int,int,int,int]], tol_factor: float = 0.75) -> List[List[int]]:
     if not rects:
         return []
@@ -196,6 +509,121 @@ def save_csv_and_txt(out_stem: str, faces: List[Face]):
     return csv_path, txt_path
 
 
+def _safe_filename(text: str) -> str:
+    keep = []
+    for ch in text.strip():
+        if ch.isalnum() or ch in "-_.":
+            keep.append(ch)
+        elif ch.isspace():
+            keep.append("_")
+    return "".join(keep).strip("._")
+
+
+def face_crop(image_bgr, face: Face, size: Tuple[int, int] = (300, 400), padding: float = 0.3, bg_color=(255, 255, 255)):
+    """
+    Schneidet ein Porträt um face aus (NumPy-Slicing, keine Kopie des Gesamtbildes).
+    Die Box wird um padding (Anteil der Boxgröße) erweitert und auf das Seitenverhältnis von size gebracht;
+    Bereiche außerhalb des Bildes werden mit bg_color aufgefüllt. Ergebnis hat genau die Größe size (B, H).
+    """
+    H, W = image_bgr.shape[:2]
+    tw, th = size
+    if face.w <= 0 or face.h <= 0:
+        return np.full((th, tw, 3), bg_color, dtype=np.uint8)
+    aspect = tw / float(th)
+    cx, cy = face.center
+    cw = face.w * (1.0 + 2.0 * padding)
+    ch = face.h * (1.0 + 2.0 * padding)
+    if cw / ch < aspect:
+        cw = ch * aspect
+    else:
+        ch = cw / aspect
+    x0 = int(round(cx - cw / 2.0)); y0 = int(round(cy - ch / 2.0))
+    x1 = x0 + max(1, int(round(cw))); y1 = y0 + max(1, int(round(ch)))
+
+    crop = image_bgr[max(0, y0):min(H, y1), max(0, x0):min(W, x1)]
+    if crop.size == 0:
+        return np.full((th, tw, 3), bg_color, dtype=np.uint8)
+    top, left = max(0, -y0), max(0, -x0)
+    bottom, right = max(0, y1 - H), max(0, x1 - W)
+    if top or left or bottom or right:
+        crop = cv2.copyMakeBorder(crop, top, bottom, left, right, cv2.BORDER_CONSTANT, value=bg_color)
+    interp = cv2.INTER_AREA if crop.shape[1] > tw else cv2.INTER_CUBIC
+    return cv2.resize(crop, (tw, th), interpolation=interp)
+
+
+def _write_image(path: str, img, quality: int = 95) -> bool:
+    # imencode + tofile statt imwrite: funktioniert auch mit Umlauten im Pfad (Windows)
+    ext = os.path.splitext(path)[1].lower() or ".jpg"
+    params = [int(cv2.IMWRITE_JPEG_QUALITY), quality] if ext in (".jpg", ".jpeg") else []
+    ok, buf = cv2.imencode(ext, img, params)
+    if not ok:
+        return False
+    try:
+        buf.tofile(path)
+    except OSError:
+        return False
+    return True
+
+
+def _parse_crop_size(text: str) -> Tuple[int, int]:
+    """argparse-Typ für --crop-size: 'BxH' mit positiven Werten."""
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        w = h = 0
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError(f"erwartet BxH, z. B. 300x400 (war: {text})")
+    return w, h
+
+
+def export_face_crops(image_bgr, faces: List[Face], out_dir: str, workers: int, size: Tuple[int, int] = (300, 400),
+                      padding: float = 0.3, fmt: str = "jpg") -> List[Tuple[Face, str, object]]:
+    """
+    Exportiert je Gesicht ein Porträt nach out_dir/<id>_<name>.<fmt>.
+    Das Bild wird nur einmal dekodiert übergeben; Zuschnitt, Skalierung und Kodierung laufen
+    parallel in einem Thread-Pool mit workers Threads (aus dem ThreadBudget, siehe configure_threads).
+    Gibt Liste (face, pfad, crop) in ID-Reihenfolge zurück.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, min(workers, len(faces)))
+
+    def job(f: Face):
+        crop = face_crop(image_bgr, f, size=size, padding=padding)
+        name = _safe_filename(f.name)
+        fname = f"{f.id:03d}_{name}.{fmt}" if name else f"{f.id:03d}.{fmt}"
+        path = os.path.join(out_dir, fname)
+        if not _write_image(path, crop):
+            raise IOError(f"Konnte Porträt nicht schreiben: {path}")
+        return f, path, crop
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, faces))
+
+
+def build_contact_sheet(crops, labels: List[str], cols: int = 6, margin: int = 12, label_height: int = 36,
+                        font_scale: float = 0.7, thickness: int = 2):
+    """Kachelt gleich große Porträts zu einem Kontaktbogen, unter jeder Kachel eine Beschriftung."""
+    if not crops:
+        return None
+    th, tw = crops[0].shape[:2]
+    cols = max(1, min(cols, len(crops)))
+    rows = int(np.ceil(len(crops) / cols))
+    cell_w, cell_h = tw + margin, th + label_height + margin
+    sheet = np.full((rows * cell_h + margin, cols * cell_w + margin, 3), 255, dtype=np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    for idx, (crop, label) in enumerate(zip(crops, labels)):
+        r, c = divmod(idx, cols)
+        x = margin + c * cell_w; y = margin + r * cell_h
+        sheet[y:y + th, x:x + tw] = crop
+        # Text ggf. kürzen, damit er unter die Kachel passt
+        while label and cv2.getTextSize(label, font, font_scale, thickness)[0][0] > tw:
+            label = label[:-1]
+        cv2.putText(sheet, label, (x, y + th + int(label_height * 0.7)), font, font_scale, (0, 0, 0), thickness, cv2.LINE_AA)
+    return sheet
+
+
 def prompt_names_in_terminal(faces: List[Face]) -> None:
     print("\\nBitte Namen zu den Personen eingeben (Enter = unbekannt).")
     for f in faces:
@@ -494,8 +922,13 @@ def names_gui_edit(faces: List[Face], out_stem: str, img_bgr, label_mode_default
     return saved_flag["saved"]
 
 
-def edit_boxes_gui(img_bgr, rects, mode_force_single, tol_factor, font_scale: float = 0.9, font_thickness: int = 2):
+def edit_boxes_gui(img_bgr, rects, mode_force_single, tol_factor, font_scale: float = 0.9, font_thickness: int = 2, detector: Optional[DetectionWorker] = None):
+    """
+    Box-Editor (OpenCV-Fenster). Mit detector öffnet das Fenster sofort; Automatik-Boxen aus dem
+    Hintergrund-Thread werden laufend eingemischt, ohne manuelle Änderungen zu überschreiben.
+    """
     if rects is None: rects=[]
+    auto_rects=[]; rejected=[]
     dragging=False; moving_idx=-1; drag_start=(0,0); move_offset=(0,0); current_rect=None
     win="Bearbeiten  [LMB ziehen: neu | LMB auf Box: verschieben | RMB: loeschen | r: Modus | s: speichern | q/ESC: schliessen]"
     cv2.namedWindow(win, cv2.WINDOW_NORMAL)
@@ -525,11 +958,15 @@ def edit_boxes_gui(img_bgr, rects, mode_force_single, tol_factor, font_scale: fl
             dragging=False; current_rect=None
         elif event==cv2.EVENT_RBUTTONDOWN:
             for r in rects[:]:
-                if inside(r,x,y): rects.remove(r); break
+                if inside(r,x,y): rects.remove(r); rejected.append(r); break
     cv2.setMouseCallback(win, on_mouse)
 
     force_single=mode_force_single
     while True:
+        if detector is not None and not dragging:
+            detected=detector.poll()
+            if detected is not None:
+                rects,auto_rects=merge_detections(rects, auto_rects, rejected, [(f.x,f.y,f.w,f.h) for f in detected])
         ordered=reorder_rects(rects, force_single, tol_factor)
         vis=img_bgr.copy()
         font=cv2.FONT_HERSHEY_SIMPLEX
@@ -544,12 +981,22 @@ def edit_boxes_gui(img_bgr, rects, mode_force_single, tol_factor, font_scale: fl
             cv2.rectangle(vis,(int(x),int(y)),(int(x+w),int(y+h)),(0,0,255),1)
         mode_txt="Modus: Single-Row (links->rechts)" if force_single else "Modus: Reihen (oben->unten, links->rechts)"
         cv2.putText(vis, mode_txt, (10,24), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (20,20,20), 2, cv2.LINE_AA)
+        if detector is not None:
+            if detector.running:
+                det_txt=f"Erkennung laeuft... (Stufe {detector.stage}/{detector.n_stages})"
+            elif detector.error is not None:
+                det_txt="Erkennung fehlgeschlagen - Boxen manuell einzeichnen"
+            else:
+                det_txt=f"Erkennung fertig: {len(detector.faces)} Gesichter"
+            cv2.putText(vis, det_txt, (10,50), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (20,20,20), 2, cv2.LINE_AA)
         cv2.imshow(win, vis)
         k=cv2.waitKey(20)&0xFF
         if k in [27, ord('q')]: rects=ordered; break
         if k==ord('r'): force_single=not force_single
         if k==ord('s'): rects=ordered; break
     cv2.destroyWindow(win)
+    if detector is not None:
+        detector.stop()
     return rects, force_single
 
 
@@ -575,6 +1022,7 @@ def main():
     ap.add_argument("--min-neighbors", type=int, default=5)
     ap.add_argument("--min-size", type=int, default=40)
     ap.add_argument("--padding", type=int, default=6)
+    ap.add_argument("--detect-stages", type=int, default=3, help="Anzahl Erkennungsstufen grob -> fein (1 = nur volle Auflösung, Standard 3).")
     ap.add_argument("--row-tol", type=float, default=0.75)
     ap.add_argument("--force-single-row", action="store_true")
     ap.add_argument("--face-cascade", default=os.path.join(cv2.data.haarcascades,"haarcascade_frontalface_default.xml"))
@@ -595,8 +1043,20 @@ def main():
     ap.add_argument("--legend-line-height", type=int, default=34, help="Zeilenhöhe in der Legende (Standard 34).")
     ap.add_argument("--legend-col-gap", type=int, default=48, help="Spaltenabstand in der Legende (Standard 48).")
     ap.add_argument("--legend-col-width", type=int, default=420, help="Zielbreite pro Textspalte in der Legende (Standard 420).")
+    # Threads / Kerne
+    ap.add_argument("--threads", type=int, default=0, help=f"Thread-Budget für OpenCV und Worker-Pools (0 = {THREADS_ENV} bzw. automatisch aus CPU-Affinität/cgroup-Quota).")
+    ap.add_argument("--pin-cpus", default="", help="Prozess auf diese CPUs beschränken, z. B. 0-3 (für mehrere parallele Läufe).")
+    # Porträt-Export
+    ap.add_argument("--export-crops", action="store_true", help="Je Person ein Porträt nach <image>_portraets/<id>_<name>.jpg exportieren.")
+    ap.add_argument("--crop-size", type=_parse_crop_size, default="300x400", help="Porträtgröße BxH in Pixel (Standard 300x400).")
+    ap.add_argument("--crop-padding", type=float, default=0.3, help="Rand um die Box als Anteil der Boxgröße (Standard 0.3).")
+    ap.add_argument("--crop-format", choices=["jpg", "png"], default="jpg", help="Dateiformat der Porträts (Standard jpg).")
+    ap.add_argument("--contact-sheet", action="store_true", help="Zusätzlich Kontaktbogen <image>_kontaktbogen.jpg erzeugen (impliziert --export-crops).")
+    ap.add_argument("--contact-sheet-cols", type=int, default=6, help="Spalten im Kontaktbogen (Standard 6).")
 
     args = ap.parse_args()
+    if args.crop_padding < 0:
+        ap.error(f"--crop-padding darf nicht negativ sein (war: {args.crop_padding}).")
     # Preset-Anpassungen
     if args.preset == "a5":
         args.font_scale = 1.4
@@ -609,6 +1069,8 @@ def main():
         args.legend_line_height = 42
         args.legend_col_width = 450
 
+    budget = configure_threads(args.threads, args.pin_cpus)
+
 
     if not os.path.exists(args.image):
         print(f"Eingabedatei nicht gefunden: {args.image}", file=sys.stderr); sys.exit(1)
@@ -637,18 +1099,28 @@ def main():
         rects = reorder_rects(rects, args.force_single_row, args.row_tol)
         faces = [Face(int(x),int(y),int(w),int(h),id=i+1,name=faces[i].name if i < len(faces) else "") for i,(x,y,w,h) in enumerate(rects)]
     else:
-        auto_faces = detect_faces(
+        # Erkennung im Hintergrund; der Editor zeigt das Bild sofort und mischt Ergebnisse laufend ein
+        detector = DetectionWorker(
             img,
             cascade_path=args.face_cascade,
             scale_factor=args.scale_factor,
             min_neighbors=args.min_neighbors,
             min_size=args.min_size,
             padding=args.padding,
-        )
-        if not auto_faces:
-            print("Hinweis: Automatik fand keine Gesichter – du kannst sie jetzt manuell einzeichnen.")
-        rects = [(f.x,f.y,f.w,f.h) for f in auto_faces]
-        rects, final_single = edit_boxes_gui(img, rects, args.force_single_row, args.row_tol, font_scale=args.font_scale, font_thickness=args.font_thickness)
+            stages=args.detect_stages,
+        ).start()
+        rects, final_single = edit_boxes_gui(img, [], args.force_single_row, args.row_tol, font_scale=args.font_scale, font_thickness=args.font_thickness, detector=detector)
+        # Laufende Stufe kann nicht abgebrochen werden; kurz warten, damit sie nicht mit den folgenden Schritten um Kerne konkurriert
+        merged_stage = detector.stage
+        if not detector.wait(timeout=2.0) or detector.stage > merged_stage:
+            print(f"Hinweis: Editor vor Ende der Erkennung geschlossen – nur Stufe {merged_stage}/{detector.n_stages} wurde übernommen.")
+        elif detector.error is not None:
+            print(f"Warnung: Automatische Erkennung fehlgeschlagen: {detector.error}", file=sys.stderr)
+        elif not detector.faces:
+            if rects:
+                print("Hinweis: Automatik fand keine Gesichter – Boxen wurden manuell eingezeichnet.")
+            else:
+                print("Hinweis: Automatik fand keine Gesichter – du kannst sie jetzt manuell einzeichnen.")
         rects = reorder_rects(rects, final_single, args.row_tol)
         faces = [Face(int(x),int(y),int(w),int(h),id=i+1) for i,(x,y,w,h) in enumerate(rects)]
 
@@ -698,6 +1170,29 @@ def main():
         legend_appended_path = f"{out_stem}_mit_legende.jpg"
         cv2.imwrite(legend_appended_path, combined, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
 
+    crops_dir = ""
+    contact_sheet_path = ""
+    if args.export_crops or args.contact_sheet:
+        crops_dir = f"{out_stem}_portraets"
+        # Budget aufteilen: Pool-Worker bekommen die Threads, OpenCV läuft darin einfädig (sonst threads x threads)
+        budget.pool_workers = max(1, min(budget.threads, len(faces)))
+        cv2.setNumThreads(1)
+        try:
+            exported = export_face_crops(img, faces, crops_dir, size=args.crop_size, padding=args.crop_padding, fmt=args.crop_format, workers=budget.pool_workers)
+        except OSError as ex:
+            print(f"Warnung: Porträt-Export fehlgeschlagen: {ex}", file=sys.stderr)
+            exported = []
+            crops_dir = ""
+        finally:
+            cv2.setNumThreads(budget.opencv_threads)
+        if args.contact_sheet and exported:
+            labels = [f"{f.id}: {f.name}" if f.name else str(f.id) for (f, _, _) in exported]
+            sheet = build_contact_sheet([c for (_, _, c) in exported], labels, cols=args.contact_sheet_cols)
+            contact_sheet_path = f"{out_stem}_kontaktbogen.jpg"
+            if not _write_image(contact_sheet_path, sheet):
+                print(f"Warnung: Konnte Kontaktbogen nicht schreiben: {contact_sheet_path}", file=sys.stderr)
+                contact_sheet_path = ""
+
     if args.show:
         win = "Ergebnis (Esc zum Schließen)"
         cv2.imshow(win, anno if not legend_appended_path else combined)
@@ -711,6 +1206,11 @@ def main():
         print(f"Bild mit Legendenleiste: {legend_appended_path}")
     print(f"CSV: {csv_path}")
     print(f"TXT: {txt_path}")
+    if crops_dir:
+        print(f"Porträts: {crops_dir} ({len(faces)})")
+    if contact_sheet_path:
+        print(f"Kontaktbogen: {contact_sheet_path}")
+    print(f"Threads: {budget.describe()}")
 
 
 if __name__ == "__main__":